@@ -0,0 +1,306 @@
+"""
+API HTTP local (JSON) com os mesmos dados do painel de repasses e vendas.
+
+Uso (a partir do diretório com as pastas Vendas/, Repasse Centauro/ e Repasse Netshoes/,
+ou indicando-o em --dir):
+
+    python api.py --porta 8600
+
+Rotas:
+- GET /pedidos            Lista paginada e filtrada de pedidos conciliados
+- GET /pedidos/<codigo>   Pedido conciliado e suas linhas brutas em cada fonte
+- GET /resumo             Totais por situação de conciliação e por marketplace, e erros de leitura
+
+Filtros de /pedidos: pagina, por_pagina, conciliado, marketplace, status, situacao_extorno, codigo,
+data_inicio, data_fim (AAAAMMDD), valor_min, valor_max (Valor Esperado) e apenas_erros.
+Parâmetros de lista (conciliado, marketplace, status, situacao_extorno) podem ser repetidos ou
+separados por vírgula.
+
+O resultado da conciliação fica em memória e só é recalculado quando os arquivos de origem
+mudam. Cada resposta traz um ETag; clientes que o reenviam em If-None-Match recebem 304.
+Se a carga dos dados falhar por completo, a resposta é 500 com a mensagem de erro.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+import conciliacao
+
+POR_PAGINA_PADRAO = 100
+POR_PAGINA_MAXIMO = 1000
+
+FONTES_DRILL_DOWN = ["vendas", "centauro", "netshoes_ns2", "netshoes_magalu", "duplicadas"]
+
+# ========== CACHE DO RESULTADO ==========
+class DadosConciliados:
+    """
+    Resultado de uma carga: fontes, pedidos conciliados, índice do drill-down, erros de leitura
+    e a impressão digital dos arquivos que os originaram. Não é alterado depois de criado.
+    """
+
+    def __init__(self, fingerprint, fontes, pedidos, erros):
+        self.fingerprint = fingerprint
+        self.fontes = fontes
+        self.pedidos = pedidos
+        self.erros = erros
+        # Índice das linhas brutas de cada pedido, para o drill-down sem varrer as fontes
+        self._linhas_por_pedido = {
+            nome: df.groupby("CÓDIGO PEDIDO", sort=False).indices if "CÓDIGO PEDIDO" in df.columns else {}
+            for nome, df in fontes.items()
+        }
+
+    def linhas_do_pedido(self, codigo):
+        return {
+            nome: df.iloc[self._linhas_por_pedido[nome].get(codigo, [])]
+            for nome, df in self.fontes.items()
+        }
+
+class ResultadoConciliacao:
+    """
+    Mantém em memória a última carga (DadosConciliados), recalculada apenas quando a
+    impressão digital dos arquivos de origem muda.
+
+    Uma nova carga substitui a anterior numa única atribuição; cada requisição obtém os
+    dados uma vez, em atualizar(), e não vê uma troca feita por outra thread no meio da resposta.
+    """
+
+    def __init__(self, base_dir, usar_lazy=False):
+        self.base_dir = base_dir
+        self.usar_lazy = usar_lazy and conciliacao.pl is not None
+        self.dados = DadosConciliados(None, {}, pd.DataFrame(columns=conciliacao.COLUNAS_RESULTADO), [])
+        self._lock = threading.Lock()
+
+    def calcular_fingerprint(self):
+        """
+        Impressão digital dos arquivos de origem (caminho, tamanho e data de modificação).
+        """
+        digest = hashlib.sha1()
+        for files in conciliacao.listar_arquivos_locais(self.base_dir):
+            for file in files:
+                info = os.stat(file)
+                digest.update(f"{file}|{info.st_size}|{info.st_mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def atualizar(self):
+        """
+        Recarrega e concilia os dados se os arquivos de origem mudaram desde a última carga.
+
+        Retorna:
+        - DadosConciliados vigentes, a serem usados do início ao fim da requisição
+        """
+        fingerprint = self.calcular_fingerprint()
+        dados = self.dados
+        if fingerprint == dados.fingerprint:
+            return dados
+        with self._lock:
+            dados = self.dados
+            if fingerprint == dados.fingerprint:
+                return dados
+            # Erros de leitura e conversão desta carga, reportados em /resumo
+            erros = []
+            conciliacao.definir_lista_erros(erros)
+            if self.usar_lazy:
+                vendas, centauro, netshoes_ns2, netshoes_magalu, duplicadas = conciliacao.carregar_dados_lazy(self.base_dir)
+                pedidos = conciliacao.conciliar_dados_lazy(vendas, centauro, netshoes_ns2, netshoes_magalu)
+            else:
+                vendas, centauro, netshoes_ns2, netshoes_magalu, duplicadas = conciliacao.carregar_dados_locais(self.base_dir)
+                pedidos = conciliacao.conciliar_e_calcular(vendas, centauro, netshoes_ns2, netshoes_magalu)
+
+            fontes = {
+                "vendas": vendas,
+                "centauro": centauro,
+                "netshoes_ns2": netshoes_ns2,
+                "netshoes_magalu": netshoes_magalu,
+                "duplicadas": duplicadas
+            }
+            # Sem pedidos carregados, as colunas ausentes surgem vazias em vez de quebrar os filtros
+            pedidos = pedidos.reindex(columns=conciliacao.COLUNAS_RESULTADO)
+
+            self.dados = DadosConciliados(fingerprint, fontes, pedidos, erros)
+            return self.dados
+
+# ========== CONSULTAS ==========
+def lista_parametro(query, nome):
+    valores = []
+    for valor in query.get(nome, []):
+        valores.extend(v.strip() for v in valor.split(',') if v.strip())
+    return valores
+
+def numero_parametro(query, nome, tipo=float, padrao=None):
+    if nome not in query:
+        return padrao
+    try:
+        return tipo(query[nome][-1])
+    except ValueError:
+        raise ValueError(f"Parâmetro inválido: {nome}={query[nome][-1]}")
+
+def filtrar_pedidos(pedidos, query):
+    """
+    Aplica os filtros da query string, com a mesma semântica dos filtros do painel.
+    """
+    mascara = pd.Series(True, index=pedidos.index)
+
+    conciliado = lista_parametro(query, "conciliado")
+    if conciliado:
+        mascara &= pedidos["Conciliado"].isin(conciliado)
+    marketplace = lista_parametro(query, "marketplace")
+    if marketplace:
+        mascara &= pedidos["MARKETPLACE"].isin(marketplace)
+    status = lista_parametro(query, "status")
+    if status:
+        mascara &= pedidos["STATUS"].isin(status)
+    situacao_extorno = lista_parametro(query, "situacao_extorno")
+    if situacao_extorno:
+        mascara &= pedidos["Situação Extorno"].isin(situacao_extorno)
+
+    codigo = query.get("codigo", [""])[-1]
+    if codigo:
+        mascara &= pedidos["CÓDIGO PEDIDO"].astype(str).str.contains(codigo, case=False, na=False, regex=False)
+
+    data_inicio = query.get("data_inicio", [""])[-1]
+    if data_inicio:
+        mascara &= pedidos["DATA PEDIDO"].astype(str) >= data_inicio
+    data_fim = query.get("data_fim", [""])[-1]
+    if data_fim:
+        mascara &= pedidos["DATA PEDIDO"].astype(str) <= data_fim
+
+    valor_min = numero_parametro(query, "valor_min")
+    if valor_min is not None:
+        mascara &= pedidos["Valor Esperado"] >= valor_min
+    valor_max = numero_parametro(query, "valor_max")
+    if valor_max is not None:
+        mascara &= pedidos["Valor Esperado"] <= valor_max
+
+    if query.get("apenas_erros", ["0"])[-1].lower() in ("1", "true", "sim"):
+        mascara &= (
+            (pedidos["Erro de Valor"] == "❌") |
+            (pedidos["Outro Erro"] == "❌") |
+            (pedidos["Conciliado"] == "Divergente")
+        )
+
+    return pedidos[mascara]
+
+def registros(df):
+    """
+    Converte um DataFrame em lista de dicionários serializáveis (NaN vira null).
+    """
+    return json.loads(df.to_json(orient="records", force_ascii=False, date_format="iso"))
+
+def consultar_pedidos(dados, query):
+    pagina = numero_parametro(query, "pagina", int, 1)
+    por_pagina = numero_parametro(query, "por_pagina", int, POR_PAGINA_PADRAO)
+    if pagina < 1 or not 1 <= por_pagina <= POR_PAGINA_MAXIMO:
+        raise ValueError(f"Use pagina >= 1 e 1 <= por_pagina <= {POR_PAGINA_MAXIMO}")
+
+    filtrados = filtrar_pedidos(dados.pedidos, query)
+    inicio = (pagina - 1) * por_pagina
+    return {
+        "total": len(filtrados),
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+        "pedidos": registros(filtrados.iloc[inicio:inicio + por_pagina])
+    }
+
+def consultar_pedido(dados, codigo):
+    pedido = dados.pedidos[dados.pedidos["CÓDIGO PEDIDO"] == codigo]
+    if pedido.empty:
+        return None
+    linhas = dados.linhas_do_pedido(codigo)
+    return {
+        "pedido": registros(pedido)[0],
+        "linhas": {nome: registros(linhas[nome]) for nome in FONTES_DRILL_DOWN}
+    }
+
+def consultar_resumo(dados):
+    pedidos = dados.pedidos
+    valores = ["Valor Esperado", "Valor Recebido", "Extorno", "Diferença"]
+    por_marketplace = pedidos.groupby("MARKETPLACE")[valores].sum()
+    por_marketplace.insert(0, "Pedidos", pedidos.groupby("MARKETPLACE").size())
+    return {
+        "total_pedidos": len(pedidos),
+        "pedidos_conciliados": int((pedidos["Conciliado"] == "OK").sum()),
+        "pedidos_divergentes": int((pedidos["Conciliado"] == "Divergente").sum()),
+        "total_extornos": float(pedidos["Extorno"].sum()),
+        "linhas_duplicadas_descartadas": len(dados.fontes.get("duplicadas", [])),
+        "por_conciliado": pedidos["Conciliado"].value_counts().to_dict(),
+        "por_situacao_extorno": pedidos["Situação Extorno"].value_counts().to_dict(),
+        "por_marketplace": registros(por_marketplace.reset_index()),
+        "erros_carregamento": registros(pd.DataFrame(dados.erros, columns=["Timestamp", "Arquivo", "Codigo_Erro", "Mensagem_Erro"]))
+    }
+
+# ========== SERVIDOR HTTP ==========
+class ApiHandler(BaseHTTPRequestHandler):
+    resultado = None  # ResultadoConciliacao compartilhado, definido em main()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        partes = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        query = parse_qs(url.query)
+
+        try:
+            dados = self.resultado.atualizar()
+        except Exception as e:
+            return self.responder(500, {"erro": f"Falha ao carregar os dados: {e}"})
+
+        # O ETag depende dos arquivos de origem e da consulta feita
+        etag = '"' + hashlib.sha1(f"{dados.fingerprint}|{self.path}".encode('utf-8')).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.responder(304, None, etag)
+
+        try:
+            if partes == ["pedidos"]:
+                corpo = consultar_pedidos(dados, query)
+            elif len(partes) == 2 and partes[0] == "pedidos":
+                corpo = consultar_pedido(dados, partes[1])
+                if corpo is None:
+                    return self.responder(404, {"erro": f"Pedido não encontrado: {partes[1]}"})
+            elif partes == ["resumo"]:
+                corpo = consultar_resumo(dados)
+            else:
+                return self.responder(404, {"erro": "Rota não encontrada"})
+        except ValueError as e:
+            return self.responder(400, {"erro": str(e)})
+        except Exception as e:
+            return self.responder(500, {"erro": f"Falha ao consultar os dados: {e}"})
+
+        self.responder(200, corpo, etag)
+
+    def responder(self, codigo, corpo, etag=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8') if corpo is not None else b""
+        self.send_response(codigo)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if corpo is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+# ========== EXECUÇÃO ==========
+def main():
+    parser = argparse.ArgumentParser(description="API JSON dos pedidos conciliados.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8600)
+    parser.add_argument("--lazy", action="store_true", help="Usar a execução lazy (Polars), se instalada")
+    parser.add_argument("--dir", default=os.getcwd(), help="Diretório com as pastas de Vendas e Repasses (padrão: o atual)")
+    args = parser.parse_args()
+
+    ApiHandler.resultado = ResultadoConciliacao(args.dir, usar_lazy=args.lazy)
+    ApiHandler.resultado.atualizar()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), ApiHandler)
+    print(f"API disponível em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
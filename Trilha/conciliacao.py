@@ -0,0 +1,1293 @@
+"""
+Leitura, deduplicação e conciliação dos repasses e vendas, sem dependência do Streamlit.
+
+Usado pelo painel (trilha.py) e pela API (api.py).
+"""
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+import contextvars
+from datetime import datetime
+
+# Polars é opcional: habilita o modo de execução lazy (plano de consulta).
+# O fastexcel é o leitor de planilhas (engine calamine) usado pelo Polars nesse modo.
+try:
+    import polars as pl
+    import fastexcel  # noqa: F401
+except ImportError:
+    pl = None
+
+# ========== MAPA DE CÓDIGOS DE ERRO ==========
+ERRO_MAP = {
+    "Leitura_Erro": 1001,          # Erro ao ler o arquivo
+    "Conversao_Tipo": 1002,        # Erro na conversão de tipo de dados
+    "Valor_Nulo": 1003,            # Valor nulo inesperado
+    "Divergencia": 1004,           # Divergência encontrada durante a conciliação
+    "Falha_Consolidacao": 1005     # Falha na consolidação dos dados
+}
+
+# Lista que coleta os erros registrados no contexto atual. Cada execução do painel roda na thread
+# da sua sessão e cada carga da API define a sua lista, de modo que sessões simultâneas não se misturam.
+lista_erros = contextvars.ContextVar("lista_erros", default=None)
+
+def definir_lista_erros(lista):
+    """
+    Define, para o contexto atual, a lista em que registrar_erro acumula os erros
+    (por exemplo, a da sessão do painel).
+    """
+    lista_erros.set(lista)
+
+# Função para registrar erros
+def registrar_erro(arquivo, tipo_erro, mensagem):
+    novo_log = {
+        "Timestamp": datetime.now(),
+        "Arquivo": arquivo,
+        "Codigo_Erro": ERRO_MAP.get(tipo_erro, 9999),
+        "Mensagem_Erro": mensagem
+    }
+    erros = lista_erros.get()
+    if erros is not None:
+        erros.append(novo_log)
+
+# ========== FUNÇÕES DE CONVERSÃO ==========
+def convert_to_float(x):
+    x = str(x).strip()
+    if '.' in x and ',' in x:
+        # Assume que '.' é separador de milhares e ',' é decimal
+        x = x.replace('.', '').replace(',', '.')
+    elif ',' in x:
+        # Assume que ',' é separador decimal
+        x = x.replace(',', '.')
+    # Se apenas '.' está presente, assume que é separador decimal
+    try:
+        return float(x)
+    except ValueError:
+        # Retorna NaN se a conversão falhar
+        return np.nan
+
+def convert_to_date(x, dayfirst=True):
+    """
+    Converte uma data para o formato AAAAMMDD.
+
+    Parâmetros:
+    - x: valor da data.
+    - dayfirst: booleano que indica se o primeiro elemento é o dia.
+
+    Retorna:
+    - String no formato AAAAMMDD ou NaN se a conversão falhar.
+    """
+    if pd.isnull(x):
+        return np.nan
+    try:
+        # Tenta converter a string para datetime com a configuração de dayfirst
+        parsed_date = pd.to_datetime(x, dayfirst=dayfirst, errors='coerce')
+        if pd.isnull(parsed_date):
+            return np.nan
+        return parsed_date.strftime('%Y%m%d')  # Formato AAAAMMDD
+    except Exception as e:
+        registrar_erro("Conversao_Data", "Conversao_Tipo", f"Erro ao converter a data {x}: {e}")
+        return np.nan
+
+# ========== FUNÇÕES DE PROCESSAMENTO DE DADOS ==========
+def processar_vendas(file_path):
+    try:
+        df = pd.read_excel(
+            file_path,
+            usecols=[
+                "CÓDIGO PEDIDO", 
+                "DATA PEDIDO", 
+                "MARKETPLACE", 
+                "STATUS", 
+                "FRETE DO LOJISTA", 
+                "FRETE", 
+                "VALOR TOTAL DOS PRODUTOS", 
+                "TOTAL DO PEDIDO"
+            ]
+        )
+        
+        # Garantir que as colunas categóricas sejam do tipo string
+        df["CÓDIGO PEDIDO"] = df["CÓDIGO PEDIDO"].astype(str)
+        df["MARKETPLACE"] = df["MARKETPLACE"].astype(str)
+        df["STATUS"] = df["STATUS"].astype(str)
+        
+        # Aplicando a função de conversão personalizada para números
+        df["FRETE"] = df["FRETE"].apply(convert_to_float)
+        df["FRETE DO LOJISTA"] = df["FRETE DO LOJISTA"].apply(convert_to_float)
+        df["VALOR TOTAL DOS PRODUTOS"] = df["VALOR TOTAL DOS PRODUTOS"].apply(convert_to_float)
+        df["TOTAL DO PEDIDO"] = df["TOTAL DO PEDIDO"].apply(convert_to_float)
+        
+        # Criando a coluna "FRETE TOTAL" somando "FRETE" e "FRETE DO LOJISTA"
+        df["FRETE TOTAL"] = df["FRETE"].fillna(0) + df["FRETE DO LOJISTA"].fillna(0)
+        
+        # Remover as colunas originais de frete
+        df = df.drop(columns=["FRETE", "FRETE DO LOJISTA"])
+        
+        # Aplicando a função de conversão para datas com dayfirst=True
+        df["DATA PEDIDO"] = df["DATA PEDIDO"].apply(lambda x: convert_to_date(x, dayfirst=True))
+        
+        # Criando a coluna "VALOR ESPERADO" = "TOTAL DO PEDIDO" - "FRETE TOTAL"
+        df["VALOR ESPERADO"] = df["TOTAL DO PEDIDO"] - df["FRETE TOTAL"]
+        
+        # Remover duplicatas em Vendas: manter apenas uma ocorrência por "CÓDIGO PEDIDO" e "VALOR ESPERADO"
+        df = df.drop_duplicates(subset=["CÓDIGO PEDIDO", "VALOR ESPERADO"], keep='first')
+        
+        return df
+    except Exception as e:
+        registrar_erro(os.path.basename(file_path), "Leitura_Erro", str(e))
+        return pd.DataFrame()
+
+def processar_centauro(file_path):
+    try:
+        df = pd.read_csv(file_path, sep=';')
+        
+        # Hash da linha bruta completa, antes da projeção, para a deduplicação entre arquivos
+        hash_linhas = calcular_hash_linhas(df)
+        df = projetar_colunas(df, ["Pedido", "DataPedido", "StatusAtendimento", "ValorPedido", "ValorFrete", "Comissao", "RepasseLiquido"])
+        
+        # Renomeando as colunas para padronizar com 'vendas'
+        df.rename(columns={
+            "Pedido": "CÓDIGO PEDIDO",
+            "DataPedido": "DATA PEDIDO",
+            "StatusAtendimento": "STATUS",
+            "ValorPedido": "TOTAL DO PEDIDO",
+            "ValorFrete": "FRETE TOTAL",
+            "Comissao": "COMISSAO",
+            "RepasseLiquido": "VALOR TOTAL DOS PRODUTOS"
+        }, inplace=True)
+        
+        # Garantir que as colunas categóricas sejam do tipo string
+        df["CÓDIGO PEDIDO"] = df["CÓDIGO PEDIDO"].astype(str)
+        df["STATUS"] = df["STATUS"].astype(str)
+        
+        # Aplicando a função de conversão para datas com dayfirst=False
+        df["DATA PEDIDO"] = df["DATA PEDIDO"].apply(lambda x: convert_to_date(x, dayfirst=False))
+        
+        # Aplicando a função de conversão personalizada para números
+        numeric_cols = ["VALOR TOTAL DOS PRODUTOS", "FRETE TOTAL", "COMISSAO", "TOTAL DO PEDIDO"]
+        for col in numeric_cols:
+            df[col] = df[col].apply(convert_to_float)
+        
+        # Adicionar coluna "Tipo" com base no valor
+        df["Tipo"] = df["VALOR TOTAL DOS PRODUTOS"].apply(lambda x: "Extorno" if x < 0 else "Produto")
+        
+        # Garantir que 'STATUS' exista
+        if 'STATUS' not in df.columns:
+            df['STATUS'] = "Não informado"
+        else:
+            df['STATUS'] = df['STATUS'].fillna("Não informado")
+        
+        # Registrar o arquivo de origem de cada linha e o seu hash (proveniência)
+        df["ARQUIVO ORIGEM"] = os.path.basename(file_path)
+        df["HASH LINHA"] = hash_linhas
+        
+        return df
+    except Exception as e:
+        registrar_erro(os.path.basename(file_path), "Leitura_Erro", str(e))
+        return pd.DataFrame()
+
+def processar_netshoes_ns2(file_path):
+    try:
+        df = pd.read_excel(file_path, skiprows=7)
+        
+        # Hash da linha bruta completa, antes da projeção, para a deduplicação entre arquivos
+        hash_linhas = calcular_hash_linhas(df)
+        df = projetar_colunas(df, [
+            "Nr Pedido Netshoes", 
+            "Data da Compra", 
+            "Valor Total Frete Lojista", 
+            "Valor Total Produtos Lojista", 
+            "Valor Total Pedido Lojista", 
+            "Tipo do Pedido", 
+            "Tarifa fixa por pedido"
+        ])
+        
+        # Renomeando as colunas para padronizar com 'vendas'
+        df.rename(columns={
+            "Nr Pedido Netshoes": "CÓDIGO PEDIDO",
+            "Valor Total Pedido Lojista": "TOTAL DO PEDIDO",
+            "Data da Compra": "DATA PEDIDO",
+            "Valor Total Frete Lojista": "FRETE TOTAL",
+            "Valor Total Produtos Lojista": "VALOR TOTAL DOS PRODUTOS",
+            "Tipo do Pedido": "STATUS",
+            "Tarifa fixa por pedido": "FRETE FIXO"
+        }, inplace=True)
+        
+        # Garantir que 'STATUS' exista
+        if 'STATUS' not in df.columns:
+            df['STATUS'] = "Não informado"
+        else:
+            df['STATUS'] = df['STATUS'].fillna("Não informado")
+        
+        # Aplicando a função de conversão personalizada para números
+        monetary_columns = ["VALOR TOTAL DOS PRODUTOS", "FRETE TOTAL", "COMISSAO", "TOTAL DO PEDIDO", "FRETE FIXO"]
+        for col in monetary_columns:
+            if col in df.columns:
+                df[col] = df[col].apply(convert_to_float)
+        
+        # Adicionar "FRETE FIXO" à "COMISSAO"
+        if "COMISSAO" in df.columns and "FRETE FIXO" in df.columns:
+            df["COMISSAO"] += df["FRETE FIXO"].fillna(0)
+        
+        # Remover a coluna "FRETE FIXO"
+        if "FRETE FIXO" in df.columns:
+            df = df.drop(columns=["FRETE FIXO"])
+        
+        # Adicionar coluna "Tipo" com base no valor
+        df["Tipo"] = df["VALOR TOTAL DOS PRODUTOS"].apply(lambda x: "Extorno" if x < 0 else "Produto")
+        
+        # Registrar o arquivo de origem de cada linha e o seu hash (proveniência)
+        df["ARQUIVO ORIGEM"] = os.path.basename(file_path)
+        df["HASH LINHA"] = hash_linhas
+        
+        return df
+    except Exception as e:
+        registrar_erro(os.path.basename(file_path), "Leitura_Erro", str(e))
+        return pd.DataFrame()
+
+def processar_netshoes_magalu(file_path):
+    try:
+        df = pd.read_excel(
+            file_path,
+            usecols=[
+                "ID do pedido Netshoes", 
+                "Data do pedido", 
+                "Valor bruto do pedido", 
+                "Valor Serviços de Marketplace", 
+                "Tarifa fixa por pedido"
+            ] + COLUNAS_IDENTIFICACAO_MAGALU
+        )
+        
+        # Cada parcela paga é identificada pela transação, não pelo valor do pedido
+        hash_linhas = calcular_hash_linhas(df, COLUNAS_IDENTIFICACAO_MAGALU)
+        df = df.drop(columns=[col for col in COLUNAS_IDENTIFICACAO_MAGALU if col != "ID do pedido Netshoes"])
+        
+        # Renomeando as colunas para padronizar com 'vendas'
+        df.rename(columns={
+            "ID do pedido Netshoes": "CÓDIGO PEDIDO",
+            "Data do pedido": "DATA PEDIDO",
+            "Valor bruto do pedido": "VALOR TOTAL DOS PRODUTOS",
+            "Valor Serviços de Marketplace": "COMISSAO",
+            "Tarifa fixa por pedido": "FRETE FIXO"
+        }, inplace=True)
+        
+        # Garantir que as colunas categóricas sejam do tipo string
+        df["CÓDIGO PEDIDO"] = df["CÓDIGO PEDIDO"].astype(str)
+        
+        # Aplicando a função de conversão personalizada para números
+        monetary_columns = ["VALOR TOTAL DOS PRODUTOS", "FRETE TOTAL", "COMISSAO", "FRETE FIXO"]
+        for col in monetary_columns:
+            if col in df.columns:
+                df[col] = df[col].apply(convert_to_float)
+        
+        # Calculando a coluna "TOTAL DO PEDIDO"
+        if "VALOR TOTAL DOS PRODUTOS" in df.columns and "FRETE TOTAL" not in df.columns:
+            df["FRETE TOTAL"] = 0.0  # Assume que não há frete total se não estiver presente
+        if "TOTAL DO PEDIDO" not in df.columns:
+            df["TOTAL DO PEDIDO"] = df["VALOR TOTAL DOS PRODUTOS"] + df["FRETE TOTAL"]
+        
+        # Adicionar "FRETE FIXO" à "COMISSAO"
+        if "COMISSAO" in df.columns and "FRETE FIXO" in df.columns:
+            df["COMISSAO"] += df["FRETE FIXO"].fillna(0)
+        
+        # Remover a coluna "FRETE FIXO"
+        if "FRETE FIXO" in df.columns:
+            df = df.drop(columns=["FRETE FIXO"])
+        
+        # Aplicando a função de conversão para datas com dayfirst=True
+        df["DATA PEDIDO"] = df["DATA PEDIDO"].apply(lambda x: convert_to_date(x, dayfirst=True))
+        
+        # Adicionar coluna "Tipo" com base no valor
+        df["Tipo"] = df["VALOR TOTAL DOS PRODUTOS"].apply(lambda x: "Extorno" if x < 0 else "Produto")
+        
+        # Garantir que 'STATUS' exista
+        if 'STATUS' not in df.columns:
+            df['STATUS'] = "Não informado"
+        else:
+            df['STATUS'] = df['STATUS'].fillna("Não informado")
+        
+        # Registrar o arquivo de origem de cada linha e o seu hash (proveniência)
+        df["ARQUIVO ORIGEM"] = os.path.basename(file_path)
+        df["HASH LINHA"] = hash_linhas
+        
+        return df
+    except Exception as e:
+        registrar_erro(os.path.basename(file_path), "Leitura_Erro", str(e))
+        return pd.DataFrame()
+
+# ========== DEDUPLICAÇÃO ENTRE ARQUIVOS ==========
+# Índice persistido entre execuções: para cada linha de repasse (hash), o arquivo cuja cópia é mantida
+ARQUIVO_INDICE_DEDUP = "indice_dedup_repasses.csv"
+COLUNAS_INDICE_DEDUP = ["FONTE", "HASH LINHA", "ARQUIVO ORIGEM"]
+
+# Colunas que descrevem a proveniência da linha e não entram no hash
+COLUNAS_PROVENIENCIA = ["ARQUIVO ORIGEM", "HASH LINHA", "ARQUIVO MANTIDO"]
+
+# Colunas que identificam uma parcela nos arquivos da Magalu. Parcela e estorno da parcela
+# compartilham a transação e diferem apenas no método de pagamento.
+COLUNAS_IDENTIFICACAO_MAGALU = [
+    "ID do pedido Netshoes",
+    "ID da transação",
+    "Método de pagamento",
+    "Parcela atual",
+    "Total de parcelas",
+    "Data da transação"
+]
+
+def projetar_colunas(df, colunas):
+    """
+    Seleciona as colunas na ordem do arquivo, como o usecols do pandas, falhando se alguma não existir.
+    """
+    faltando = [col for col in colunas if col not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas não encontradas no arquivo: {faltando}")
+    return df[[col for col in df.columns if col in colunas]].copy()
+
+def normalizar_valor_hash(x):
+    """
+    Normaliza um valor para compor o hash de uma linha de repasse.
+
+    Números são arredondados a duas casas e textos perdem espaços e caixa,
+    de forma que a mesma linha lida de arquivos diferentes gere o mesmo hash.
+    """
+    if pd.isnull(x):
+        return ""
+    if isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, bool):
+        return f"{float(x):.2f}"
+    texto = str(x).strip()
+    # Números lidos como texto (cada leitor de Excel infere tipos de um jeito) recebem o mesmo formato
+    try:
+        return f"{float(texto):.2f}"
+    except ValueError:
+        return texto.upper()
+
+def calcular_hash_linhas(df, colunas=None):
+    """
+    Calcula um hash SHA-1 por linha sobre as colunas normalizadas.
+
+    Parâmetros:
+    - df: DataFrame lido do arquivo, antes da projeção nas colunas da conciliação
+    - colunas: colunas que identificam a linha (padrão: todas, exceto as de proveniência)
+
+    Retorna:
+    - Series com o hash hexadecimal de cada linha, alinhada ao índice de df
+    """
+    if df.empty:
+        return pd.Series(index=df.index, dtype=str)
+    if colunas is None:
+        colunas = sorted(col for col in df.columns if col not in COLUNAS_PROVENIENCIA)
+    normalizado = df[colunas].apply(lambda col: col.map(normalizar_valor_hash))
+    chaves = normalizado.agg('|'.join, axis=1)
+    return chaves.map(lambda chave: hashlib.sha1(chave.encode('utf-8')).hexdigest())
+
+def carregar_indice_dedup(caminho):
+    """
+    Lê o índice de deduplicação persistido. Retorna um índice vazio se não existir.
+    """
+    if not os.path.exists(caminho):
+        return pd.DataFrame(columns=COLUNAS_INDICE_DEDUP)
+    try:
+        indice = pd.read_csv(caminho, dtype=str)
+        return indice[COLUNAS_INDICE_DEDUP]
+    except Exception as e:
+        registrar_erro(os.path.basename(caminho), "Leitura_Erro", f"Índice de deduplicação ignorado: {e}")
+        return pd.DataFrame(columns=COLUNAS_INDICE_DEDUP)
+
+def salvar_indice_dedup(indice, caminho):
+    try:
+        indice.to_csv(caminho, index=False)
+    except Exception as e:
+        registrar_erro(os.path.basename(caminho), "Falha_Consolidacao", f"Erro ao salvar índice de deduplicação: {e}")
+
+def deduplicar_repasses(df, fonte, indice):
+    """
+    Remove linhas de repasse repetidas em arquivos diferentes de uma mesma fonte
+    (por exemplo, arquivos NS2 com períodos sobrepostos).
+
+    Linhas repetidas dentro de um mesmo arquivo são lançamentos legítimos, então cada hash
+    mantém tantas cópias quanto o arquivo que mais o repete. A n-ésima cópia vem do arquivo
+    preferido, se ele a tiver, ou do primeiro arquivo que a tiver. O arquivo preferido é o
+    registrado no índice, se ainda contiver a linha, ou o primeiro arquivo em que ela aparece.
+
+    Parâmetros:
+    - df: DataFrame combinado da fonte, com a coluna "ARQUIVO ORIGEM" (e "HASH LINHA",
+      calculado na leitura; se ausente, é calculado sobre as colunas de df)
+    - fonte: nome da fonte (chave no índice)
+    - indice: DataFrame do índice de deduplicação
+
+    Retorna:
+    - DataFrame com as linhas mantidas
+    - DataFrame com as linhas descartadas, indicando em "ARQUIVO MANTIDO" qual cópia ficou
+    - Índice de deduplicação atualizado
+    """
+    if df.empty or "ARQUIVO ORIGEM" not in df.columns:
+        return df, pd.DataFrame(columns=["FONTE"] + COLUNAS_PROVENIENCIA), indice
+
+    df = df.copy()
+    if "HASH LINHA" not in df.columns:
+        df["HASH LINHA"] = calcular_hash_linhas(df)
+
+    # Primeiro arquivo em que cada linha aparece
+    arquivo_mantido = df.drop_duplicates(subset="HASH LINHA").set_index("HASH LINHA")["ARQUIVO ORIGEM"]
+
+    # Respeitar a escolha de execuções anteriores apenas quando o arquivo registrado ainda
+    # contém a linha nesta execução (um arquivo reexportado pode não tê-la mais)
+    candidatos = df[["HASH LINHA", "ARQUIVO ORIGEM"]].drop_duplicates()
+    registrados = (
+        indice[indice["FONTE"] == fonte][["HASH LINHA", "ARQUIVO ORIGEM"]]
+        .merge(candidatos, on=["HASH LINHA", "ARQUIVO ORIGEM"], how="inner")
+        .drop_duplicates(subset="HASH LINHA")
+        .set_index("HASH LINHA")["ARQUIVO ORIGEM"]
+    )
+    arquivo_mantido.update(registrados)
+
+    # Numerar as cópias de cada linha dentro do seu arquivo e manter uma linha por (hash, cópia),
+    # priorizando o arquivo preferido e, depois, a ordem de leitura
+    copias = pd.DataFrame({
+        "HASH LINHA": df["HASH LINHA"].to_numpy(),
+        "COPIA": df.groupby(["HASH LINHA", "ARQUIVO ORIGEM"], sort=False).cumcount().to_numpy(),
+        "PREFERIDO": (df["ARQUIVO ORIGEM"] == df["HASH LINHA"].map(arquivo_mantido)).to_numpy(),
+        "ARQUIVO ORIGEM": df["ARQUIVO ORIGEM"].to_numpy()
+    })
+    mantidas = (
+        copias.sort_values("PREFERIDO", ascending=False, kind="stable")
+        .drop_duplicates(subset=["HASH LINHA", "COPIA"])
+    )
+    duplicada = ~copias.index.isin(mantidas.index)
+
+    # Para cada linha, o arquivo de onde veio a cópia de mesmo número que foi mantida
+    df["ARQUIVO MANTIDO"] = copias.merge(
+        mantidas[["HASH LINHA", "COPIA", "ARQUIVO ORIGEM"]].rename(columns={"ARQUIVO ORIGEM": "ARQUIVO MANTIDO"}),
+        on=["HASH LINHA", "COPIA"], how="left"
+    )["ARQUIVO MANTIDO"].to_numpy()
+
+    duplicadas = df[duplicada].copy()
+    duplicadas.insert(0, "FONTE", fonte)
+
+    # Atualizar o índice, preservando entradas de arquivos que não foram lidos nesta execução
+    indice_fonte = pd.DataFrame({
+        "FONTE": fonte,
+        "HASH LINHA": arquivo_mantido.index,
+        "ARQUIVO ORIGEM": arquivo_mantido.values
+    })
+    indice_restante = indice[~((indice["FONTE"] == fonte) & (indice["HASH LINHA"].isin(arquivo_mantido.index)))]
+    indice = pd.concat([indice_restante, indice_fonte], ignore_index=True)
+
+    return df[~duplicada].reset_index(drop=True), duplicadas.reset_index(drop=True), indice
+
+# ========== PAREAMENTO DE EXTORNOS ==========
+# Passadas do pareamento, da mais para a menos restritiva: (coluna do produto comparada ao extorno, exigir mesma data)
+PASSADAS_PAREAMENTO = [
+    ("VALOR", True),
+    ("TOTAL", True),
+    ("VALOR", False),
+    ("TOTAL", False)
+]
+
+# Lançamentos de tarifa (logística reversa, cobranças retroativas) acompanham um extorno, mas não anulam produto
+PREFIXOS_TARIFA_EXTORNO = ("Descontar Reversa", "Descontar Retroativos")
+
+def montar_linhas_repasse(*dfs):
+    """
+    Reúne os lançamentos de repasse das fontes nas colunas usadas pelo pareamento de extornos.
+
+    Retorna:
+    - DataFrame com "CÓDIGO PEDIDO", "DATA PEDIDO", "STATUS", "VALOR", "TOTAL" e "Tipo", na ordem das fontes
+    """
+    partes = []
+    for df in dfs:
+        if df.empty or "CÓDIGO PEDIDO" not in df.columns:
+            continue
+        partes.append(pd.DataFrame({
+            "CÓDIGO PEDIDO": df["CÓDIGO PEDIDO"],
+            "DATA PEDIDO": df["DATA PEDIDO"] if "DATA PEDIDO" in df.columns else np.nan,
+            "STATUS": df["STATUS"] if "STATUS" in df.columns else "Não informado",
+            "VALOR": df["VALOR TOTAL DOS PRODUTOS"].fillna(0.0) if "VALOR TOTAL DOS PRODUTOS" in df.columns else 0.0,
+            "TOTAL": df["TOTAL DO PEDIDO"] if "TOTAL DO PEDIDO" in df.columns else np.nan,
+            "Tipo": df["Tipo"] if "Tipo" in df.columns else "Produto"
+        }))
+    if not partes:
+        return pd.DataFrame(columns=["CÓDIGO PEDIDO", "DATA PEDIDO", "STATUS", "VALOR", "TOTAL", "Tipo"])
+    return pd.concat(partes, ignore_index=True)
+
+def marcar_pares(chaves, extorno):
+    """
+    Pareia um a um extornos e produtos que compartilham a mesma chave.
+
+    As linhas são ordenadas de forma estável pela chave e pelo lado; o n-ésimo lançamento
+    de um lado é pareado se o outro lado da mesma chave tiver mais de n lançamentos.
+
+    Parâmetros:
+    - chaves: lista de arrays inteiros que formam a chave
+    - extorno: array booleano, True para extornos e False para produtos
+
+    Retorna:
+    - Array booleano indicando as linhas pareadas
+    """
+    n = len(extorno)
+
+    # Reduzir a chave composta a um único inteiro denso (sem risco de estouro)
+    chave = np.zeros(n, dtype=np.int64)
+    for coluna in chaves:
+        ids, unicos = pd.factorize(coluna)
+        chave = pd.factorize(chave * len(unicos) + ids)[0]
+
+    # Ordenação estável por (chave, lado): empates mantêm a ordem dos lançamentos
+    lado = chave * 2 + extorno
+    ordem = np.argsort(lado, kind="stable")
+    lado_ord = lado[ordem]
+    extorno_ord = extorno[ordem]
+
+    nova_chave = np.ones(n, dtype=bool)
+    nova_chave[1:] = (lado_ord[1:] // 2) != (lado_ord[:-1] // 2)
+    novo_lado = np.ones(n, dtype=bool)
+    novo_lado[1:] = lado_ord[1:] != lado_ord[:-1]
+
+    posicao = np.arange(n)
+    ocorrencia = posicao - np.maximum.accumulate(np.where(novo_lado, posicao, 0))
+    grupo = np.cumsum(nova_chave) - 1
+    extornos_grupo = np.bincount(grupo, weights=extorno_ord).astype(np.int64)
+    produtos_grupo = np.bincount(grupo) - extornos_grupo
+    outro_lado = np.where(extorno_ord, produtos_grupo[grupo], extornos_grupo[grupo])
+
+    pareado = np.empty(n, dtype=bool)
+    pareado[ordem] = ocorrencia < outro_lado
+    return pareado
+
+def parear_extornos(linhas):
+    """
+    Pareia os extornos de cada pedido com os lançamentos de produto que eles anulam.
+
+    Primeiro, cada extorno igual, em centavos, ao valor líquido ("VALOR") ou bruto ("TOTAL") de um
+    produto anula esse produto inteiro, exigindo a mesma data antes de aceitar qualquer data. Cada
+    passada é uma ordenação vetorizada (marcar_pares), sem laços por pedido. Os extornos que sobram
+    são somados por pedido e comparados aos produtos ainda não anulados: vários extornos podem
+    somar um produto (por exemplo, um por unidade) e um extorno menor que o produto é parcial.
+    Tarifas de logística reversa e retroativos (PREFIXOS_TARIFA_EXTORNO) não são extornos de produto.
+
+    Parâmetros:
+    - linhas: DataFrame retornado por montar_linhas_repasse
+
+    Retorna:
+    - Dicionário CÓDIGO PEDIDO -> situação ("Sem Extorno", "Totalmente Extornado",
+      "Parcialmente Extornado" ou "Extorno sem Par", quando os extornos excedem os produtos)
+    """
+    linhas = linhas[linhas["CÓDIGO PEDIDO"].notna()]
+    if linhas.empty:
+        return {}
+
+    # Chaves inteiras: pedido e data fatorados, valores em centavos (0 = sem valor)
+    pedido, pedidos = pd.factorize(linhas["CÓDIGO PEDIDO"])
+    data = pd.factorize(linhas["DATA PEDIDO"].fillna("").astype(str))[0]
+    centavos = {
+        coluna: (linhas[coluna].astype(float).abs() * 100).round().fillna(0).to_numpy(dtype=np.int64)
+        for coluna in ["VALOR", "TOTAL"]
+    }
+    e_extorno = (linhas["Tipo"] == "Extorno").to_numpy()
+    tarifa = linhas["STATUS"].fillna("").astype(str).str.startswith(PREFIXOS_TARIFA_EXTORNO).to_numpy()
+    extorno = e_extorno & ~tarifa & (centavos["VALOR"] > 0)
+    pareado = np.zeros(len(linhas), dtype=bool)
+
+    for coluna, mesma_data in PASSADAS_PAREAMENTO:
+        produto = ~e_extorno & (centavos[coluna] > 0)
+        candidatos = np.flatnonzero((extorno | produto) & ~pareado)
+        if len(candidatos) == 0:
+            continue
+        valor = np.where(extorno, centavos["VALOR"], centavos[coluna])[candidatos]
+        chaves = [pedido[candidatos], valor] + ([data[candidatos]] if mesma_data else [])
+        pareado[candidatos] = marcar_pares(chaves, extorno[candidatos])
+
+    # Soma, por pedido, dos extornos e dos produtos que não foram anulados um a um
+    produto_livre = ~e_extorno & ((centavos["VALOR"] > 0) | (centavos["TOTAL"] > 0)) & ~pareado
+    extorno_livre = extorno & ~pareado
+    n_pedidos = len(pedidos)
+
+    def somar(mascara, valores):
+        return np.bincount(pedido, weights=np.where(mascara, valores, 0), minlength=n_pedidos)
+
+    # Sem valor bruto (ou líquido), o produto é comparado pelo outro valor
+    liquido = np.where(centavos["VALOR"] > 0, centavos["VALOR"], centavos["TOTAL"])
+    bruto = np.where(centavos["TOTAL"] > 0, centavos["TOTAL"], centavos["VALOR"])
+
+    extornado = somar(extorno_livre, centavos["VALOR"])
+    restante_liquido = somar(produto_livre, liquido)
+    restante_bruto = somar(produto_livre, bruto)
+    limite = somar(produto_livre, np.maximum(liquido, bruto))
+    extornos = np.bincount(pedido, weights=extorno, minlength=n_pedidos)
+
+    situacao = np.select(
+        [
+            extornos == 0,
+            extornado > limite,
+            (extornado == restante_liquido) | (extornado == restante_bruto)
+        ],
+        ["Sem Extorno", "Extorno sem Par", "Totalmente Extornado"],
+        default="Parcialmente Extornado"
+    )
+    return dict(zip(pedidos.tolist(), situacao.tolist()))
+
+# ========== FUNÇÃO DE CONCILIACAO ==========
+def conciliar_dados(vendas, centauro, netshoes_ns2, netshoes_magalu):
+    """
+    Concilia os dados das diferentes fontes.
+
+    Parâmetros:
+    - vendas: DataFrame de Vendas
+    - centauro: DataFrame de Centauro
+    - netshoes_ns2: DataFrame de Netshoes NS2
+    - netshoes_magalu: DataFrame de Netshoes Magalu
+
+    Retorna:
+    - DataFrame consolidado com conciliação e sinalização de divergências
+    """
+    # Criar um dicionário para armazenar os dados por "CÓDIGO PEDIDO"
+    pedidos_dict = {}
+
+    # Processar Vendas para obter "Valor Esperado"
+    vendas_grouped = vendas.groupby("CÓDIGO PEDIDO").agg({
+        "DATA PEDIDO": 'first',
+        "MARKETPLACE": lambda x: ', '.join(x.dropna().unique()),
+        "STATUS": lambda x: ', '.join(x.dropna().unique()),
+        "VALOR ESPERADO": 'sum'
+    }).reset_index()
+
+    for _, row in vendas_grouped.iterrows():
+        codigo = row["CÓDIGO PEDIDO"]
+        pedidos_dict[codigo] = {
+            "CÓDIGO PEDIDO": codigo,
+            "DATA PEDIDO": row["DATA PEDIDO"],
+            "MARKETPLACE": row["MARKETPLACE"],
+            "STATUS": row["STATUS"],
+            "Valor Esperado": row["VALOR ESPERADO"],
+            "Valor Recebido": 0.0,  # Soma dos Produtos
+            "Extorno": 0.0,         # Soma dos Extornos
+            "Diferença": 0.0,
+            "Conciliado": "OK",
+            "Possível Motivo": "Nenhum",
+            "Erro de Valor": "✅",
+            "Outro Erro": "✅",
+            "Situação Extorno": "Sem Extorno"
+        }
+
+    # Função para acumular valores recebidos e extornos
+    def acumular_recebido_extorno(df, fonte):
+        for _, row in df.iterrows():
+            codigo = row["CÓDIGO PEDIDO"]
+            valor = row.get("VALOR TOTAL DOS PRODUTOS", 0.0)
+            tipo = row.get("Tipo", "Produto")
+            if pd.isna(valor):
+                valor = 0.0
+            valor = float(valor)
+            if codigo in pedidos_dict:
+                if tipo == "Produto":
+                    pedidos_dict[codigo]["Valor Recebido"] += valor
+                elif tipo == "Extorno":
+                    pedidos_dict[codigo]["Extorno"] += valor
+            else:
+                # Caso o pedido não esteja em vendas, adiciona com Valor Esperado = 0
+                pedidos_dict[codigo] = {
+                    "CÓDIGO PEDIDO": codigo,
+                    "DATA PEDIDO": row.get("DATA PEDIDO", np.nan),
+                    "MARKETPLACE": row.get("MARKETPLACE", ""),
+                    "STATUS": row.get("STATUS", "Não informado"),
+                    "Valor Esperado": 0.0,
+                    "Valor Recebido": valor if tipo == "Produto" else 0.0,
+                    "Extorno": valor if tipo == "Extorno" else 0.0,
+                    "Diferença": 0.0,
+                    "Conciliado": "Divergente",
+                    "Possível Motivo": "Pedido não encontrado na planilha de vendas.",
+                    "Erro de Valor": "❌",
+                    "Outro Erro": "❌",
+                    "Situação Extorno": "Sem Extorno"
+                }
+
+    # Acumular valores de Centauro
+    acumular_recebido_extorno(centauro, "Centauro")
+
+    # Acumular valores de Netshoes NS2
+    acumular_recebido_extorno(netshoes_ns2, "Netshoes NS2")
+
+    # Acumular valores de Netshoes Magalu
+    acumular_recebido_extorno(netshoes_magalu, "Netshoes Magalu")
+
+    # Parear cada extorno com o lançamento de produto que ele anula
+    situacoes_extorno = parear_extornos(montar_linhas_repasse(centauro, netshoes_ns2, netshoes_magalu))
+
+    # Agora, calcular a diferença e conciliar
+    for codigo, dados in pedidos_dict.items():
+        dados["Diferença"] = dados["Valor Recebido"] - dados["Valor Esperado"]
+        dados["Situação Extorno"] = situacoes_extorno.get(codigo, "Sem Extorno")
+        
+        # Verificar Erro de Valor; um pedido totalmente extornado foi desfeito e não tem valor a conferir
+        if dados["Situação Extorno"] == "Totalmente Extornado":
+            dados["Erro de Valor"] = "✅"
+            if dados["Possível Motivo"] == "Nenhum":
+                dados["Possível Motivo"] = "Pedido totalmente extornado."
+        elif abs(dados["Diferença"]) >= 0.01:
+            dados["Erro de Valor"] = "❌"
+            dados["Conciliado"] = "Divergente"
+            if dados["Situação Extorno"] == "Parcialmente Extornado":
+                dados["Possível Motivo"] = "Verificar valor após extorno parcial do pedido."
+            else:
+                dados["Possível Motivo"] = "Verificar discrepâncias no valor do pedido."
+        else:
+            dados["Erro de Valor"] = "✅"
+        
+        # Verificar se os extornos do pedido correspondem a produtos repassados
+        if dados["Situação Extorno"] == "Extorno sem Par":
+            dados["Outro Erro"] = "❌"
+            dados["Conciliado"] = "Divergente"
+            if dados["Possível Motivo"] == "Nenhum":
+                dados["Possível Motivo"] = "Verificar extornos do pedido."
+        else:
+            dados["Outro Erro"] = "✅"
+
+    # Converter o dicionário para DataFrame
+    final_df = pd.DataFrame.from_dict(pedidos_dict, orient='index').reset_index(drop=True)
+
+    return final_df
+
+# ========== FUNÇÃO DE CONCILIACAO FINAL ==========
+def conciliar_e_calcular(vendas, centauro, netshoes_ns2, netshoes_magalu):
+    final_df = conciliar_dados(vendas, centauro, netshoes_ns2, netshoes_magalu)
+    return final_df
+
+# ========== FUNÇÃO DE CARREGAMENTO DOS ARQUIVOS ==========
+def listar_arquivos_locais(base_dir):
+    """
+    Lista, em ordem alfabética, os arquivos de cada fonte dentro de base_dir.
+
+    Retorna:
+    - Listas de caminhos de Vendas, Centauro, Netshoes NS2 e Netshoes Magalu
+    """
+    folder_path_vendas = os.path.join(base_dir, 'Vendas')
+    folder_path_centauro = os.path.join(base_dir, 'Repasse Centauro')
+    folder_path_netshoes_ns2 = os.path.join(base_dir, 'Repasse Netshoes', 'NS2')
+    folder_path_netshoes_magalu = os.path.join(base_dir, 'Repasse Netshoes', 'Magalu Pagamentos')
+
+    # Verificar se as pastas existem
+    for path in [folder_path_vendas, folder_path_centauro, folder_path_netshoes_ns2, folder_path_netshoes_magalu]:
+        if not os.path.exists(path):
+            registrar_erro(path, "Leitura_Erro", f"Pasta não encontrada: {path}")
+
+    # Listar arquivos em cada pasta
+    files_vendas = [os.path.join(folder_path_vendas, f) for f in sorted(os.listdir(folder_path_vendas)) if f.endswith(('.xlsx', '.xls'))] if os.path.exists(folder_path_vendas) else []
+    files_centauro = [os.path.join(folder_path_centauro, f) for f in sorted(os.listdir(folder_path_centauro)) if f.endswith('.csv')] if os.path.exists(folder_path_centauro) else []
+    files_netshoes_ns2 = [os.path.join(folder_path_netshoes_ns2, f) for f in sorted(os.listdir(folder_path_netshoes_ns2)) if f.endswith(('.xlsx', '.xls'))] if os.path.exists(folder_path_netshoes_ns2) else []
+    files_netshoes_magalu = [os.path.join(folder_path_netshoes_magalu, f) for f in sorted(os.listdir(folder_path_netshoes_magalu)) if f.endswith(('.xlsx', '.xls'))] if os.path.exists(folder_path_netshoes_magalu) else []
+
+    return files_vendas, files_centauro, files_netshoes_ns2, files_netshoes_magalu
+
+def deduplicar_fontes(base_dir, centauro, netshoes_ns2, netshoes_magalu):
+    """
+    Remove linhas de repasse repetidas entre arquivos de cada fonte, usando o índice persistido em base_dir.
+
+    Retorna:
+    - DataFrames de Centauro, Netshoes NS2 e Netshoes Magalu sem as duplicatas
+    - DataFrame com as linhas duplicadas descartadas de todas as fontes
+    """
+    caminho_indice = os.path.join(base_dir, ARQUIVO_INDICE_DEDUP)
+    indice = carregar_indice_dedup(caminho_indice)
+    centauro, duplicadas_centauro, indice = deduplicar_repasses(centauro, "Centauro", indice)
+    netshoes_ns2, duplicadas_netshoes_ns2, indice = deduplicar_repasses(netshoes_ns2, "Netshoes NS2", indice)
+    netshoes_magalu, duplicadas_netshoes_magalu, indice = deduplicar_repasses(netshoes_magalu, "Netshoes Magalu", indice)
+    salvar_indice_dedup(indice, caminho_indice)
+
+    duplicadas = pd.concat(
+        [duplicadas_centauro, duplicadas_netshoes_ns2, duplicadas_netshoes_magalu],
+        ignore_index=True
+    )
+
+    return centauro, netshoes_ns2, netshoes_magalu, duplicadas
+
+def carregar_dados_locais(base_dir):
+    """
+    Carrega os dados das fontes locais.
+
+    Parâmetros:
+    - base_dir: diretório com as pastas Vendas, Repasse Centauro e Repasse Netshoes
+
+    Retorna:
+    - DataFrames combinados de cada fonte, sem linhas de repasse duplicadas entre arquivos
+    - DataFrame com as linhas duplicadas descartadas e o arquivo cuja cópia foi mantida
+    """
+    files_vendas, files_centauro, files_netshoes_ns2, files_netshoes_magalu = listar_arquivos_locais(base_dir)
+
+    # Processar Vendas
+    all_vendas = []
+    for file in files_vendas:
+        df_vendas = processar_vendas(file)
+        if not df_vendas.empty:
+            all_vendas.append(df_vendas)
+
+    if all_vendas:
+        combined_vendas = pd.concat(all_vendas, ignore_index=True)
+    else:
+        combined_vendas = pd.DataFrame(columns=["CÓDIGO PEDIDO", "DATA PEDIDO", "MARKETPLACE", "STATUS", "VALOR ESPERADO"])
+
+    # Processar Centauro
+    all_centauro = []
+    for file in files_centauro:
+        df_centauro = processar_centauro(file)
+        if not df_centauro.empty:
+            all_centauro.append(df_centauro)
+
+    if all_centauro:
+        combined_centauro = pd.concat(all_centauro, ignore_index=True)
+    else:
+        combined_centauro = pd.DataFrame(columns=["CÓDIGO PEDIDO", "VALOR TOTAL DOS PRODUTOS"])
+
+    # Processar Netshoes NS2
+    all_netshoes_ns2 = []
+    for file in files_netshoes_ns2:
+        df_netshoes_ns2 = processar_netshoes_ns2(file)
+        if not df_netshoes_ns2.empty:
+            all_netshoes_ns2.append(df_netshoes_ns2)
+
+    if all_netshoes_ns2:
+        combined_netshoes_ns2 = pd.concat(all_netshoes_ns2, ignore_index=True)
+    else:
+        combined_netshoes_ns2 = pd.DataFrame(columns=["CÓDIGO PEDIDO", "VALOR TOTAL DOS PRODUTOS", "Tipo"])
+
+    # Processar Netshoes Magalu
+    all_netshoes_magalu = []
+    for file in files_netshoes_magalu:
+        df_netshoes_magalu = processar_netshoes_magalu(file)
+        if not df_netshoes_magalu.empty:
+            all_netshoes_magalu.append(df_netshoes_magalu)
+
+    if all_netshoes_magalu:
+        combined_netshoes_magalu = pd.concat(all_netshoes_magalu, ignore_index=True)
+    else:
+        combined_netshoes_magalu = pd.DataFrame(columns=["CÓDIGO PEDIDO", "VALOR TOTAL DOS PRODUTOS", "Tipo"])
+
+    # Remover linhas de repasse repetidas entre arquivos da mesma fonte
+    combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu, combined_duplicadas = deduplicar_fontes(
+        base_dir, combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu
+    )
+
+    return combined_vendas, combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu, combined_duplicadas
+
+# ========== EXECUÇÃO LAZY (POLARS) ==========
+# Mesmas regras de processar_* e conciliar_dados, expressas como planos lazy do Polars.
+# Os arquivos Excel são lidos pelo próprio Polars (engine calamine) e o CSV da Centauro por scan_csv;
+# os planos das fontes são executados juntos e em várias threads. A deduplicação entre arquivos é a
+# mesma do modo pandas e os filtros do painel e da API são aplicados sobre o resultado.
+
+COLUNAS_RESULTADO = [
+    "CÓDIGO PEDIDO",
+    "DATA PEDIDO",
+    "MARKETPLACE",
+    "STATUS",
+    "Valor Esperado",
+    "Valor Recebido",
+    "Extorno",
+    "Diferença",
+    "Conciliado",
+    "Possível Motivo",
+    "Erro de Valor",
+    "Outro Erro",
+    "Situação Extorno"
+]
+
+def pl_convert_to_float(col, dtype):
+    """
+    Equivalente vetorizado de convert_to_float para uma coluna do plano.
+    """
+    if dtype.is_numeric():
+        return pl.col(col).cast(pl.Float64)
+    texto = pl.col(col).cast(pl.String).str.strip_chars()
+    tem_ponto = texto.str.contains(".", literal=True)
+    tem_virgula = texto.str.contains(",", literal=True)
+    texto = (
+        pl.when(tem_ponto & tem_virgula)
+        .then(texto.str.replace_all(".", "", literal=True).str.replace_all(",", ".", literal=True))
+        .when(tem_virgula)
+        .then(texto.str.replace_all(",", ".", literal=True))
+        .otherwise(texto)
+    )
+    return texto.cast(pl.Float64, strict=False).alias(col)
+
+def pl_convert_to_date(col, dayfirst=True):
+    """
+    Aplica convert_to_date uma única vez por valor distinto da coluna.
+    """
+    def converter(serie):
+        valores = serie.drop_nulls().unique().to_list()
+        datas = {}
+        for valor in valores:
+            data = convert_to_date(valor, dayfirst=dayfirst)
+            datas[valor] = None if pd.isnull(data) else data
+        return serie.replace_strict(datas, default=None, return_dtype=pl.String)
+    return pl.col(col).map_batches(converter, return_dtype=pl.String)
+
+def pl_tipo_lancamento():
+    return (
+        pl.when(pl.col("VALOR TOTAL DOS PRODUTOS") < 0)
+        .then(pl.lit("Extorno"))
+        .otherwise(pl.lit("Produto"))
+        .alias("Tipo")
+    )
+
+# Textos que o read_excel do pandas lê como nulos (valores padrão de na_values)
+TEXTOS_NULOS_PANDAS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+]
+
+def pl_ler_excel(file_path, colunas=None, linha_cabecalho=0):
+    """
+    Lê uma planilha com o Polars (engine calamine), com a mesma projeção e os mesmos nulos do pandas.
+
+    Excel não pode ser lido de forma lazy; a leitura já é projetada nas colunas pedidas, que,
+    como no usecols do pandas, ficam na ordem do arquivo.
+    """
+    opcoes = {"header_row": linha_cabecalho}
+    if colunas is not None:
+        ordem = pl.read_excel(file_path, engine="calamine", read_options={**opcoes, "n_rows": 0}).columns
+        # Colunas ausentes ficam no fim, para que a leitura falhe como no pandas
+        colunas = sorted(colunas, key=lambda col: ordem.index(col) if col in ordem else len(ordem))
+    df = pl.read_excel(file_path, engine="calamine", columns=colunas, read_options=opcoes)
+    return df.lazy().with_columns(
+        pl.when(pl.col(pl.String).is_in(TEXTOS_NULOS_PANDAS)).then(None).otherwise(pl.col(pl.String)).name.keep()
+    )
+
+def pl_hash_linhas(colunas=None):
+    """
+    Mesmo hash de calcular_hash_linhas, calculado sobre as colunas lidas do arquivo (padrão: todas).
+    """
+    def calcular(estrutura):
+        return pl.Series(calcular_hash_linhas(estrutura.struct.unnest().to_pandas(), colunas).to_numpy(), dtype=pl.String)
+    return pl.struct(colunas or pl.all()).map_batches(calcular, return_dtype=pl.String).alias("HASH LINHA")
+
+def pl_proveniencia(file_path):
+    """
+    Acrescenta "ARQUIVO ORIGEM" e move "HASH LINHA" para o fim, na ordem de colunas do modo pandas.
+    """
+    return lambda lf: lf.with_columns(pl.lit(os.path.basename(file_path)).alias("ARQUIVO ORIGEM")).select(
+        pl.all().exclude("HASH LINHA"), pl.col("HASH LINHA")
+    )
+
+def escanear_vendas(file_path):
+    lf = pl_ler_excel(
+        file_path,
+        colunas=[
+            "CÓDIGO PEDIDO",
+            "DATA PEDIDO",
+            "MARKETPLACE",
+            "STATUS",
+            "FRETE DO LOJISTA",
+            "FRETE",
+            "VALOR TOTAL DOS PRODUTOS",
+            "TOTAL DO PEDIDO"
+        ]
+    )
+    schema = lf.collect_schema()
+    return (
+        lf.with_columns(
+            pl.col("CÓDIGO PEDIDO", "MARKETPLACE", "STATUS").cast(pl.String),
+            *[pl_convert_to_float(col, schema[col]) for col in ["FRETE", "FRETE DO LOJISTA", "VALOR TOTAL DOS PRODUTOS", "TOTAL DO PEDIDO"]]
+        )
+        .with_columns((pl.col("FRETE").fill_null(0) + pl.col("FRETE DO LOJISTA").fill_null(0)).alias("FRETE TOTAL"))
+        .drop("FRETE", "FRETE DO LOJISTA")
+        .with_columns(pl_convert_to_date("DATA PEDIDO", dayfirst=True))
+        .with_columns((pl.col("TOTAL DO PEDIDO") - pl.col("FRETE TOTAL")).alias("VALOR ESPERADO"))
+        .unique(subset=["CÓDIGO PEDIDO", "VALOR ESPERADO"], keep="first", maintain_order=True)
+    )
+
+def escanear_centauro(file_path):
+    usecols = ["Pedido", "DataPedido", "StatusAtendimento", "ValorPedido", "ValorFrete", "Comissao", "RepasseLiquido"]
+    lf = pl.scan_csv(file_path, separator=';', infer_schema_length=None).with_columns(pl_hash_linhas())
+    # Manter a ordem das colunas do arquivo, como o usecols do pandas
+    lf = lf.select([col for col in lf.collect_schema().names() if col in usecols] + ["HASH LINHA"]).rename({
+        "Pedido": "CÓDIGO PEDIDO",
+        "DataPedido": "DATA PEDIDO",
+        "StatusAtendimento": "STATUS",
+        "ValorPedido": "TOTAL DO PEDIDO",
+        "ValorFrete": "FRETE TOTAL",
+        "Comissao": "COMISSAO",
+        "RepasseLiquido": "VALOR TOTAL DOS PRODUTOS"
+    })
+    schema = lf.collect_schema()
+    numeric_cols = ["VALOR TOTAL DOS PRODUTOS", "FRETE TOTAL", "COMISSAO", "TOTAL DO PEDIDO"]
+    return (
+        lf.with_columns(pl.col("CÓDIGO PEDIDO", "STATUS").cast(pl.String))
+        .with_columns(pl_convert_to_date("DATA PEDIDO", dayfirst=False))
+        .with_columns(*[pl_convert_to_float(col, schema[col]) for col in numeric_cols])
+        .with_columns(pl_tipo_lancamento())
+        .with_columns(pl.col("STATUS").fill_null("Não informado"))
+        .pipe(pl_proveniencia(file_path))
+    )
+
+def escanear_netshoes_ns2(file_path):
+    usecols = [
+        "Nr Pedido Netshoes",
+        "Data da Compra",
+        "Valor Total Frete Lojista",
+        "Valor Total Produtos Lojista",
+        "Valor Total Pedido Lojista",
+        "Tipo do Pedido",
+        "Tarifa fixa por pedido"
+    ]
+    lf = pl_ler_excel(file_path, linha_cabecalho=7).with_columns(pl_hash_linhas())
+    lf = lf.select([col for col in lf.collect_schema().names() if col in usecols] + ["HASH LINHA"]).rename({
+        "Nr Pedido Netshoes": "CÓDIGO PEDIDO",
+        "Valor Total Pedido Lojista": "TOTAL DO PEDIDO",
+        "Data da Compra": "DATA PEDIDO",
+        "Valor Total Frete Lojista": "FRETE TOTAL",
+        "Valor Total Produtos Lojista": "VALOR TOTAL DOS PRODUTOS",
+        "Tipo do Pedido": "STATUS",
+        "Tarifa fixa por pedido": "FRETE FIXO"
+    })
+    schema = lf.collect_schema()
+    monetary_columns = ["VALOR TOTAL DOS PRODUTOS", "FRETE TOTAL", "TOTAL DO PEDIDO"]
+    return (
+        lf.with_columns(pl.col("STATUS").fill_null("Não informado"))
+        .with_columns(*[pl_convert_to_float(col, schema[col]) for col in monetary_columns])
+        .drop("FRETE FIXO")
+        .with_columns(pl_tipo_lancamento())
+        .pipe(pl_proveniencia(file_path))
+    )
+
+def escanear_netshoes_magalu(file_path):
+    usecols = [
+        "ID do pedido Netshoes",
+        "Data do pedido",
+        "Valor bruto do pedido",
+        "Valor Serviços de Marketplace",
+        "Tarifa fixa por pedido"
+    ]
+    lf = pl_ler_excel(file_path, colunas=usecols + [col for col in COLUNAS_IDENTIFICACAO_MAGALU if col not in usecols]).with_columns(
+        pl_hash_linhas(COLUNAS_IDENTIFICACAO_MAGALU)
+    )
+    lf = lf.select([col for col in lf.collect_schema().names() if col in usecols] + ["HASH LINHA"]).rename({
+        "ID do pedido Netshoes": "CÓDIGO PEDIDO",
+        "Data do pedido": "DATA PEDIDO",
+        "Valor bruto do pedido": "VALOR TOTAL DOS PRODUTOS",
+        "Valor Serviços de Marketplace": "COMISSAO",
+        "Tarifa fixa por pedido": "FRETE FIXO"
+    })
+    schema = lf.collect_schema()
+    monetary_columns = ["VALOR TOTAL DOS PRODUTOS", "COMISSAO", "FRETE FIXO"]
+    return (
+        lf.with_columns(pl.col("CÓDIGO PEDIDO").cast(pl.String))
+        .with_columns(*[pl_convert_to_float(col, schema[col]) for col in monetary_columns])
+        .with_columns(pl.lit(0.0).alias("FRETE TOTAL"))
+        .with_columns((pl.col("VALOR TOTAL DOS PRODUTOS") + pl.col("FRETE TOTAL")).alias("TOTAL DO PEDIDO"))
+        .with_columns(pl.col("COMISSAO") + pl.col("FRETE FIXO").fill_null(0))
+        .drop("FRETE FIXO")
+        .with_columns(pl_convert_to_date("DATA PEDIDO", dayfirst=True))
+        .with_columns(
+            pl_tipo_lancamento(),
+            pl.lit("Não informado").alias("STATUS")
+        )
+        .pipe(pl_proveniencia(file_path))
+    )
+
+def escanear_fonte(files, escanear):
+    """
+    Monta o plano lazy de uma fonte, concatenando os arquivos que puderem ser lidos.
+    """
+    planos = []
+    for file in files:
+        try:
+            lf = escanear(file)
+            lf.collect_schema()  # Valida colunas e tipos antes da execução
+            planos.append(lf)
+        except Exception as e:
+            registrar_erro(os.path.basename(file), "Leitura_Erro", str(e))
+    if not planos:
+        return None
+    return pl.concat(planos, how="vertical_relaxed")
+
+def carregar_dados_lazy(base_dir):
+    """
+    Carrega os dados das fontes locais com planos lazy do Polars, executados em paralelo.
+
+    Parâmetros:
+    - base_dir: diretório com as pastas Vendas, Repasse Centauro e Repasse Netshoes
+
+    Retorna:
+    - Os mesmos DataFrames de carregar_dados_locais
+    """
+    files_vendas, files_centauro, files_netshoes_ns2, files_netshoes_magalu = listar_arquivos_locais(base_dir)
+
+    fontes = [
+        (files_vendas, escanear_vendas, ["CÓDIGO PEDIDO", "DATA PEDIDO", "MARKETPLACE", "STATUS", "VALOR ESPERADO"]),
+        (files_centauro, escanear_centauro, ["CÓDIGO PEDIDO", "VALOR TOTAL DOS PRODUTOS"]),
+        (files_netshoes_ns2, escanear_netshoes_ns2, ["CÓDIGO PEDIDO", "VALOR TOTAL DOS PRODUTOS", "Tipo"]),
+        (files_netshoes_magalu, escanear_netshoes_magalu, ["CÓDIGO PEDIDO", "VALOR TOTAL DOS PRODUTOS", "Tipo"])
+    ]
+    planos = [escanear_fonte(files, escanear) for files, escanear, _ in fontes]
+
+    # Executar todos os planos de uma vez, em paralelo
+    ativos = [plano for plano in planos if plano is not None]
+    try:
+        coletados = iter(pl.collect_all(ativos))
+    except Exception as e:
+        registrar_erro("Execução Lazy", "Falha_Consolidacao", str(e))
+        coletados = iter([pl.DataFrame()] * len(ativos))
+
+    combined = []
+    for plano, (_, _, colunas_vazias) in zip(planos, fontes):
+        df = next(coletados).to_pandas() if plano is not None else pd.DataFrame()
+        combined.append(df if not df.empty else pd.DataFrame(columns=colunas_vazias))
+    combined_vendas, combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu = combined
+
+    # Remover linhas de repasse repetidas entre arquivos da mesma fonte
+    combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu, combined_duplicadas = deduplicar_fontes(
+        base_dir, combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu
+    )
+
+    return combined_vendas, combined_centauro, combined_netshoes_ns2, combined_netshoes_magalu, combined_duplicadas
+
+def pl_linhas_repasse(df, ordem_inicial):
+    """
+    Projeta um DataFrame de repasse nas colunas usadas pela conciliação, com os mesmos padrões de conciliar_dados.
+    """
+    colunas = {
+        "CÓDIGO PEDIDO": pl.col("CÓDIGO PEDIDO").cast(pl.String),
+        "DATA PEDIDO": pl.col("DATA PEDIDO").cast(pl.String) if "DATA PEDIDO" in df.columns else pl.lit(None, dtype=pl.String),
+        "STATUS": pl.col("STATUS").cast(pl.String) if "STATUS" in df.columns else pl.lit("Não informado"),
+        "VALOR": pl.col("VALOR TOTAL DOS PRODUTOS").cast(pl.Float64) if "VALOR TOTAL DOS PRODUTOS" in df.columns else pl.lit(0.0),
+        "TOTAL": pl.col("TOTAL DO PEDIDO").cast(pl.Float64) if "TOTAL DO PEDIDO" in df.columns else pl.lit(None, dtype=pl.Float64),
+        "Tipo": pl.col("Tipo").cast(pl.String) if "Tipo" in df.columns else pl.lit("Produto")
+    }
+    presentes = [col for col in ["CÓDIGO PEDIDO", "DATA PEDIDO", "STATUS", "VALOR TOTAL DOS PRODUTOS", "TOTAL DO PEDIDO", "Tipo"] if col in df.columns]
+    return (
+        pl.from_pandas(df[presentes]).lazy()
+        .select(**colunas)
+        .with_row_index("_ordem", offset=ordem_inicial)
+        .with_columns(pl.col("VALOR").fill_nan(None).fill_null(0.0), pl.col("TOTAL").fill_nan(None))
+    )
+
+def pl_parear_extornos(linhas):
+    """
+    Executa parear_extornos como uma etapa do plano lazy, sobre as linhas de pl_linhas_repasse.
+
+    O pareamento já é vetorizado em NumPy; reaproveitá-lo garante o mesmo resultado nos dois modos.
+
+    Retorna:
+    - LazyFrame com "CÓDIGO PEDIDO" e "Situação Extorno"
+    """
+    schema = {"CÓDIGO PEDIDO": pl.String, "Situação Extorno": pl.String}
+
+    def parear(df):
+        situacoes = parear_extornos(df.to_pandas())
+        return pl.DataFrame(
+            {"CÓDIGO PEDIDO": list(situacoes.keys()), "Situação Extorno": list(situacoes.values())},
+            schema=schema
+        )
+
+    return (
+        linhas.sort("_ordem")
+        .select("CÓDIGO PEDIDO", "DATA PEDIDO", "STATUS", "VALOR", "TOTAL", "Tipo")
+        .map_batches(parear, schema=schema)
+    )
+
+def conciliar_dados_lazy(vendas, centauro, netshoes_ns2, netshoes_magalu, colunas=None):
+    """
+    Concilia os dados com um plano lazy do Polars. Produz o mesmo resultado de conciliar_dados.
+
+    Parâmetros:
+    - vendas, centauro, netshoes_ns2, netshoes_magalu: DataFrames de cada fonte
+    - colunas: colunas do resultado a manter (padrão: todas)
+
+    Retorna:
+    - DataFrame consolidado com conciliação e sinalização de divergências
+    """
+    colunas = colunas or COLUNAS_RESULTADO
+
+    # Agrupar Vendas por pedido, na mesma ordem (ordenada) do groupby do pandas
+    vendas_agg = (
+        pl.from_pandas(vendas[["CÓDIGO PEDIDO", "DATA PEDIDO", "MARKETPLACE", "STATUS", "VALOR ESPERADO"]]).lazy()
+        .with_columns(
+            pl.col("CÓDIGO PEDIDO", "DATA PEDIDO", "MARKETPLACE", "STATUS").cast(pl.String),
+            pl.col("VALOR ESPERADO").cast(pl.Float64)
+        )
+        .filter(pl.col("CÓDIGO PEDIDO").is_not_null())
+        .group_by("CÓDIGO PEDIDO")
+        .agg(
+            pl.col("DATA PEDIDO").drop_nulls().first(),
+            pl.col("MARKETPLACE").drop_nulls().unique(maintain_order=True).str.join(", "),
+            pl.col("STATUS").drop_nulls().unique(maintain_order=True).str.join(", "),
+            pl.col("VALOR ESPERADO").fill_nan(None).sum().alias("Valor Esperado")
+        )
+        .sort("CÓDIGO PEDIDO")
+        .with_row_index("_ordem")
+        .with_columns(pl.lit(0).alias("_grupo"))
+    )
+
+    # Concatenar as linhas de repasse na ordem em que conciliar_dados as acumula
+    linhas = []
+    ordem = 0
+    for df in [centauro, netshoes_ns2, netshoes_magalu]:
+        if "CÓDIGO PEDIDO" in df.columns and not df.empty:
+            linhas.append(pl_linhas_repasse(df, ordem))
+            ordem += len(df)
+    if linhas:
+        linhas = pl.concat(linhas, how="vertical_relaxed")
+    else:
+        linhas = pl.LazyFrame(schema={
+            "_ordem": pl.UInt32, "CÓDIGO PEDIDO": pl.String, "DATA PEDIDO": pl.String,
+            "STATUS": pl.String, "VALOR": pl.Float64, "TOTAL": pl.Float64, "Tipo": pl.String
+        })
+    linhas = linhas.cache()
+
+    repasse_agg = (
+        linhas.group_by("CÓDIGO PEDIDO")
+        .agg(
+            pl.col("_ordem").min(),
+            pl.col("DATA PEDIDO").first(),
+            pl.col("STATUS").first(),
+            pl.col("VALOR").filter(pl.col("Tipo") == "Produto").sum().alias("Valor Recebido"),
+            pl.col("VALOR").filter(pl.col("Tipo") == "Extorno").sum().alias("Extorno")
+        )
+    )
+
+    # Pedidos de Vendas recebem os valores de repasse; os demais entram como não encontrados
+    pedidos_vendas = vendas_agg.join(
+        repasse_agg.select("CÓDIGO PEDIDO", "Valor Recebido", "Extorno"), on="CÓDIGO PEDIDO", how="left"
+    )
+    pedidos_sem_venda = (
+        repasse_agg.join(vendas_agg.select("CÓDIGO PEDIDO"), on="CÓDIGO PEDIDO", how="anti")
+        .with_columns(
+            pl.lit("").alias("MARKETPLACE"),
+            pl.lit(0.0).alias("Valor Esperado"),
+            pl.lit(1).alias("_grupo")
+        )
+    )
+    pedidos = pl.concat([pedidos_vendas, pedidos_sem_venda], how="diagonal_relaxed").join(
+        pl_parear_extornos(linhas), on="CÓDIGO PEDIDO", how="left"
+    )
+
+    diferenca = pl.col("Valor Recebido") - pl.col("Valor Esperado")
+    totalmente = pl.col("Situação Extorno") == "Totalmente Extornado"
+    parcialmente = pl.col("Situação Extorno") == "Parcialmente Extornado"
+    erro_valor = (diferenca.abs() >= 0.01) & ~totalmente
+    erro_extorno = pl.col("Situação Extorno") == "Extorno sem Par"
+    nao_encontrado = pl.col("_grupo") == 1
+
+    resultado = (
+        pedidos
+        .with_columns(
+            pl.col("Valor Recebido", "Extorno").fill_null(0.0),
+            pl.col("Situação Extorno").fill_null("Sem Extorno")
+        )
+        .with_columns(
+            diferenca.alias("Diferença"),
+            pl.when(erro_valor | erro_extorno | nao_encontrado).then(pl.lit("Divergente")).otherwise(pl.lit("OK")).alias("Conciliado"),
+            pl.when(erro_valor & parcialmente).then(pl.lit("Verificar valor após extorno parcial do pedido."))
+            .when(erro_valor).then(pl.lit("Verificar discrepâncias no valor do pedido."))
+            .when(nao_encontrado).then(pl.lit("Pedido não encontrado na planilha de vendas."))
+            .when(totalmente).then(pl.lit("Pedido totalmente extornado."))
+            .when(erro_extorno).then(pl.lit("Verificar extornos do pedido."))
+            .otherwise(pl.lit("Nenhum")).alias("Possível Motivo"),
+            pl.when(erro_valor).then(pl.lit("❌")).otherwise(pl.lit("✅")).alias("Erro de Valor"),
+            pl.when(erro_extorno).then(pl.lit("❌")).otherwise(pl.lit("✅")).alias("Outro Erro")
+        )
+        .sort("_grupo", "_ordem")
+        .select(colunas)
+    )
+
+    return resultado.collect().to_pandas()
@@ -0,0 +1,188 @@
+"""
+Verificações da deduplicação, do pareamento de extornos e da conciliação
+(python -m pytest, a partir da pasta Trilha).
+"""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import conciliacao
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_CENTAURO = os.path.join(BASE_DIR, "Repasse Centauro", "2024-09 - Centauro.csv")
+REVERSA = "Descontar Reversa Centauro Envios"
+
+
+# ========== DEDUPLICAÇÃO ==========
+def repasses_por_arquivo(*arquivos):
+    """
+    Monta um DataFrame de repasse a partir de tuplas (arquivo, hash da linha).
+    """
+    return pd.DataFrame({
+        "VALOR TOTAL DOS PRODUTOS": 100.0,
+        "ARQUIVO ORIGEM": [arquivo for arquivo, _ in arquivos],
+        "HASH LINHA": [hash_linha for _, hash_linha in arquivos]
+    })
+
+
+def indice_vazio():
+    return pd.DataFrame(columns=conciliacao.COLUNAS_INDICE_DEDUP)
+
+
+def test_dedup_mantem_copias_repetidas_no_mesmo_arquivo():
+    # A linha aparece uma vez em A e duas em B: as duas cópias de B são lançamentos legítimos
+    df = repasses_por_arquivo(("A", "h1"), ("B", "h1"), ("B", "h1"))
+    mantidas, duplicadas, _ = conciliacao.deduplicar_repasses(df, "NS2", indice_vazio())
+
+    assert len(mantidas) == 2
+    assert mantidas["ARQUIVO ORIGEM"].tolist() == ["A", "B"]
+    assert duplicadas["ARQUIVO ORIGEM"].tolist() == ["B"]
+    assert duplicadas["ARQUIVO MANTIDO"].tolist() == ["A"]
+
+
+def test_dedup_ignora_indice_de_arquivo_reexportado_sem_a_linha():
+    # O índice aponta para A, mas A foi reexportado sem a linha: a única cópia restante, em B, fica
+    indice = pd.DataFrame({"FONTE": ["NS2"], "HASH LINHA": ["h1"], "ARQUIVO ORIGEM": ["A"]})
+    df = repasses_por_arquivo(("A", "h2"), ("B", "h1"))
+    mantidas, duplicadas, indice = conciliacao.deduplicar_repasses(df, "NS2", indice)
+
+    assert mantidas["HASH LINHA"].tolist() == ["h2", "h1"]
+    assert duplicadas.empty
+    assert indice.set_index("HASH LINHA")["ARQUIVO ORIGEM"].to_dict() == {"h1": "B", "h2": "A"}
+
+
+def test_dedup_indice_persistido_preserva_o_arquivo_mantido(tmp_path):
+    caminho = str(tmp_path / conciliacao.ARQUIVO_INDICE_DEDUP)
+    df = repasses_por_arquivo(("A", "h1"), ("B", "h1"))
+    _, _, indice = conciliacao.deduplicar_repasses(df, "NS2", conciliacao.carregar_indice_dedup(caminho))
+    conciliacao.salvar_indice_dedup(indice, caminho)
+
+    lido = conciliacao.carregar_indice_dedup(caminho)
+    pd.testing.assert_frame_equal(lido, indice[conciliacao.COLUNAS_INDICE_DEDUP], check_dtype=False)
+
+    # Lidos em outra ordem, os arquivos mantêm a escolha registrada na execução anterior
+    df = repasses_por_arquivo(("B", "h1"), ("A", "h1"))
+    mantidas, duplicadas, _ = conciliacao.deduplicar_repasses(df, "NS2", lido)
+    assert mantidas["ARQUIVO ORIGEM"].tolist() == ["A"]
+    assert duplicadas["ARQUIVO MANTIDO"].tolist() == ["A"]
+
+
+# ========== CARREGAMENTO LAZY ==========
+@pytest.mark.skipif(conciliacao.pl is None, reason="polars não instalado")
+def test_carregamento_e_conciliacao_lazy_iguais_ao_pandas(tmp_path):
+    # Uma cópia dos dados para cada carga, para que ambas comecem com o índice de deduplicação vazio
+    for carga in ["pandas", "lazy"]:
+        for pasta in ["Vendas", "Repasse Centauro", "Repasse Netshoes"]:
+            shutil.copytree(os.path.join(BASE_DIR, pasta), str(tmp_path / carga / pasta))
+
+    fontes = conciliacao.carregar_dados_locais(str(tmp_path / "pandas"))
+    fontes_lazy = conciliacao.carregar_dados_lazy(str(tmp_path / "lazy"))
+    for df, df_lazy in zip(fontes, fontes_lazy):
+        pd.testing.assert_frame_equal(df, df_lazy, check_dtype=False)
+
+    resultado = conciliacao.conciliar_e_calcular(*fontes[:4])[conciliacao.COLUNAS_RESULTADO]
+    resultado_lazy = conciliacao.conciliar_dados_lazy(*fontes_lazy[:4])
+    pd.testing.assert_frame_equal(resultado.reset_index(drop=True), resultado_lazy, check_dtype=False)
+
+
+# ========== PAREAMENTO DE EXTORNOS ==========
+def linhas(*lancamentos):
+    """
+    Monta linhas de repasse a partir de tuplas (pedido, VALOR, TOTAL, STATUS[, DATA PEDIDO]).
+    """
+    return pd.DataFrame([
+        {
+            "CÓDIGO PEDIDO": pedido,
+            "DATA PEDIDO": data[0] if data else "20240901",
+            "STATUS": status,
+            "VALOR": valor,
+            "TOTAL": total,
+            "Tipo": "Extorno" if valor < 0 else "Produto"
+        }
+        for pedido, valor, total, status, *data in lancamentos
+    ])
+
+
+@pytest.mark.parametrize("lancamentos, situacao", [
+    # Extorno do valor bruto, acompanhado da tarifa de logística reversa
+    ([("1", 394.92, 499.9, "Repasse Normal"), ("1", -499.9, None, "Descontar Hove"), ("1", -21.94, None, REVERSA)],
+     "Totalmente Extornado"),
+    # Produto de várias unidades extornado uma unidade por vez
+    ([("1", 1184.97, 1499.97, "Repasse Normal")] + [("1", -499.99, None, "Descontar Hove")] * 3,
+     "Totalmente Extornado"),
+    # Extornos pareados pela data antes do valor: sem a data, -120 anularia o líquido do primeiro produto
+    ([("1", 120.0, 150.0, "Repasse Normal", "20240901"), ("1", 96.0, 120.0, "Repasse Normal", "20240902"),
+      ("1", -120.0, None, "Descontar Hove", "20240902"), ("1", -150.0, None, "Descontar Hove", "20240901")],
+     "Totalmente Extornado"),
+    ([("1", 100.0, None, "Repasse Normal"), ("1", -40.0, None, "Descontar Hove")], "Parcialmente Extornado"),
+    ([("1", 100.0, None, "Repasse Normal"), ("1", 50.0, None, "Repasse Normal"), ("1", -50.0, None, "Descontar Hove")],
+     "Parcialmente Extornado"),
+    ([("1", 100.0, None, "Repasse Normal"), ("1", -150.0, None, "Descontar Hove")], "Extorno sem Par"),
+    ([("1", -466.28, None, "Descontar Retroativos")], "Sem Extorno"),
+])
+def test_situacao_extorno(lancamentos, situacao):
+    assert conciliacao.parear_extornos(linhas(*lancamentos)) == {"1": situacao}
+
+
+def test_extornos_centauro_pareados():
+    centauro = conciliacao.processar_centauro(ARQUIVO_CENTAURO)
+    situacoes = conciliacao.parear_extornos(conciliacao.montar_linhas_repasse(centauro))
+    extornados = pd.Series({
+        codigo: situacoes[codigo]
+        for codigo in centauro.loc[centauro["Tipo"] == "Extorno", "CÓDIGO PEDIDO"].unique()
+    })
+
+    assert situacoes["97103325101"] == "Totalmente Extornado"
+    assert situacoes["97080457202"] == "Totalmente Extornado"
+    # Pedidos só com tarifas de reversa ou retroativos ficam sem extorno
+    assert extornados.value_counts().to_dict() == {
+        "Sem Extorno": 76,
+        "Extorno sem Par": 32,
+        "Totalmente Extornado": 23
+    }
+    # Restam sem par apenas extornos cujo produto foi repassado fora deste arquivo
+    sem_par = extornados[extornados == "Extorno sem Par"].index
+    assert centauro[centauro["CÓDIGO PEDIDO"].isin(sem_par) & (centauro["Tipo"] == "Produto")].empty
+
+
+# ========== CONCILIAÇÃO ==========
+def conciliar_lazy(vendas, centauro, netshoes_ns2, netshoes_magalu):
+    if conciliacao.pl is None:
+        pytest.skip("polars não instalado")
+    return conciliacao.conciliar_dados_lazy(vendas, centauro, netshoes_ns2, netshoes_magalu)
+
+
+@pytest.mark.parametrize("conciliar", [conciliacao.conciliar_e_calcular, conciliar_lazy])
+def test_conciliacao_por_situacao_extorno(conciliar):
+    vendas = pd.DataFrame({
+        "CÓDIGO PEDIDO": ["1", "2", "3", "4", "5", "6"],
+        "DATA PEDIDO": "20240901",
+        "MARKETPLACE": "Centauro",
+        "STATUS": "Entregue",
+        "VALOR ESPERADO": [100.0, 125.0, 100.0, 100.0, 100.0, 100.0]
+    })
+    centauro = linhas(
+        ("1", 100.0, 100.0, "Repasse Normal"),
+        ("2", 100.0, 125.0, "Repasse Normal"), ("2", -125.0, None, "Descontar Hove"),
+        ("3", 100.0, 100.0, "Repasse Normal"), ("3", -40.0, None, "Descontar Hove"),
+        ("4", 100.0, 100.0, "Repasse Normal"), ("4", -150.0, None, "Descontar Hove"),
+        ("5", 100.0, 100.0, "Repasse Normal"), ("5", -20.0, None, REVERSA),
+        ("6", 80.0, 100.0, "Repasse Normal"), ("6", -40.0, None, "Descontar Hove")
+    ).rename(columns={"VALOR": "VALOR TOTAL DOS PRODUTOS", "TOTAL": "TOTAL DO PEDIDO"})
+
+    resultado = conciliar(vendas, centauro, pd.DataFrame(), pd.DataFrame()).set_index("CÓDIGO PEDIDO")
+    colunas = ["Situação Extorno", "Conciliado", "Erro de Valor", "Outro Erro", "Possível Motivo"]
+
+    assert resultado[colunas].to_dict("index") == {
+        "1": dict(zip(colunas, ["Sem Extorno", "OK", "✅", "✅", "Nenhum"])),
+        # Pedido desfeito: a comissão retida não é cobrada como divergência de valor
+        "2": dict(zip(colunas, ["Totalmente Extornado", "OK", "✅", "✅", "Pedido totalmente extornado."])),
+        "3": dict(zip(colunas, ["Parcialmente Extornado", "OK", "✅", "✅", "Nenhum"])),
+        # Só um extorno sem par acusa Outro Erro
+        "4": dict(zip(colunas, ["Extorno sem Par", "Divergente", "✅", "❌", "Verificar extornos do pedido."])),
+        "5": dict(zip(colunas, ["Sem Extorno", "OK", "✅", "✅", "Nenhum"])),
+        "6": dict(zip(colunas, ["Parcialmente Extornado", "Divergente", "❌", "✅",
+                                "Verificar valor após extorno parcial do pedido."]))
+    }